@@ -9,6 +9,20 @@ import pandas as pd
 from datetime import datetime, timedelta
 import base64
 import io
+import sys
+import time
+import uuid
+import hashlib
+import threading
+import json
+import tempfile
+import marshal
+import cProfile
+import pstats
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo
 
 # Load environment variables
 load_dotenv()
@@ -26,12 +40,259 @@ N8N_WEBHOOK_URL = os.getenv(
     "https://primary-production-10917.up.railway.app/webhook"
 )
 
+# Profiling settings (can also be toggled per session on the Settings page)
+PROFILING_ENV_ENABLED = os.getenv("AI_CALLER_PROFILE", "").lower() in ("1", "true", "yes")
+PROFILE_HISTORY_SIZE = int(os.getenv("AI_CALLER_PROFILE_HISTORY", "10"))
+PROFILE_MODES = ["Timing spans", "Timing spans + cProfile"]
+
+# Recap cache settings (recaps for closed days never change, so they are kept on disk)
+RECAP_CACHE_DIR = os.getenv("AI_CALLER_RECAP_CACHE_DIR", os.path.join(".cache", "recaps"))
+RECAP_FETCH_WORKERS = int(os.getenv("AI_CALLER_RECAP_WORKERS", "8"))
+# Days within the settle period may still receive late calls and are never cached;
+# the business timezone decides when a day starts (server time if unset)
+RECAP_SETTLE_DAYS = int(os.getenv("AI_CALLER_RECAP_SETTLE_DAYS", "0"))
+RECAP_TIMEZONE = os.getenv("AI_CALLER_TIMEZONE")
+
+# Per-session memory settings
+SESSION_BUDGET_MB = float(os.getenv("AI_CALLER_SESSION_BUDGET_MB", "50"))
+PAGE_CACHE_TTL = float(os.getenv("AI_CALLER_PAGE_CACHE_TTL", "30"))
+SESSION_STALE_SECONDS = 3600
+
+# Conditional requests: local copies of GET responses shared by all sessions,
+# revalidated with ETag/Last-Modified. List endpoints listed here can also
+# answer with only the records changed since a cursor: (records key, id field)
+CONDITIONAL_REQUESTS = os.getenv("AI_CALLER_CONDITIONAL_REQUESTS", "1").lower() not in ("0", "false", "no")
+RESPONSE_STORE_MAX_ENTRIES = int(os.getenv("AI_CALLER_RESPONSE_STORE_SIZE", "200"))
+DELTA_ENDPOINTS = {
+    "api/leads": ("leads", "lead_id"),
+    "api/get-campaigns": ("campaigns", "campaign_id")
+}
+
+# Spans recorded during the current rerun (the script re-executes per rerun,
+# so these module-level values are fresh every time)
+RERUN_STARTED = time.perf_counter()
+RERUN_SPANS = []
+RERUN_SPAN_DEPTH = [0]
+RERUN_PROFILER = None
+RERUN_PROFILER_ERROR = None
+
+def profiling_enabled():
+    """Check whether profiling is on for this session"""
+    return PROFILING_ENV_ENABLED or st.session_state.get("profiling_enabled", False)
+
+@contextmanager
+def profile_span(name, kind="section"):
+    """Time a block of the current rerun when profiling is enabled"""
+    if not profiling_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    depth = RERUN_SPAN_DEPTH[0]
+    RERUN_SPAN_DEPTH[0] += 1
+    try:
+        yield
+    finally:
+        RERUN_SPAN_DEPTH[0] -= 1
+        RERUN_SPANS.append({
+            "name": name,
+            "kind": kind,
+            "depth": depth,
+            "start_ms": (start - RERUN_STARTED) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000
+        })
+
+def start_rerun_profile():
+    """Start a cProfile capture of the whole rerun if requested"""
+    global RERUN_PROFILER, RERUN_PROFILER_ERROR
+    # Never leave a previous rerun's profiler running: from Python 3.12
+    # cProfile uses one process-wide hook and a second enable() fails
+    leaked = st.session_state.pop("rerun_profiler", None)
+    if leaked is not None:
+        leaked.disable()
+    
+    if profiling_enabled() and st.session_state.get("profile_mode") == PROFILE_MODES[1]:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a concurrent session's) is active; keep timing spans only
+            RERUN_PROFILER_ERROR = str(e)
+            return
+        RERUN_PROFILER = profiler
+        st.session_state.rerun_profiler = profiler
+
+def finish_rerun_profile(page_name, completed=True):
+    """Stop profiling and keep the rerun in the session's profile history"""
+    pstats_dump = None
+    if RERUN_PROFILER is not None:
+        RERUN_PROFILER.disable()
+        st.session_state.pop("rerun_profiler", None)
+        if profiling_enabled():
+            # Same format as pstats.Stats.dump_stats(), loadable with pstats.Stats(path)
+            pstats_dump = marshal.dumps(pstats.Stats(RERUN_PROFILER).stats)
+    if not profiling_enabled():
+        return None
+    total_ms = (time.perf_counter() - RERUN_STARTED) * 1000
+    
+    if "profile_history" not in st.session_state:
+        st.session_state.profile_history = deque(maxlen=PROFILE_HISTORY_SIZE)
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "page": page_name or "Unknown",
+        "completed": completed,
+        "total_ms": total_ms,
+        "spans": sorted(RERUN_SPANS, key=lambda span: span["start_ms"]),
+        "pstats": pstats_dump,
+        "profiler_error": RERUN_PROFILER_ERROR
+    }
+    st.session_state.profile_history.append(record)
+    return record
+
+def render_profile_waterfall(record, width=40):
+    """Show a per-section waterfall for one profiled rerun"""
+    total_ms = max(record["total_ms"], 0.001)
+    rows = []
+    for span in record["spans"]:
+        offset = int(span["start_ms"] / total_ms * width)
+        length = max(1, int(span["duration_ms"] / total_ms * width))
+        rows.append({
+            "Section": "  " * span["depth"] + span["name"],
+            "Type": span["kind"],
+            "Start (ms)": round(span["start_ms"], 1),
+            "Duration (ms)": round(span["duration_ms"], 1),
+            "Timeline": "·" * offset + "█" * min(length, width - offset)
+        })
+    
+    st.caption(f"{record['page']} rerun at {record['timestamp']} took {record['total_ms']:.1f} ms")
+    if record["profiler_error"]:
+        st.caption(f"cProfile was skipped for this rerun: {record['profiler_error']}")
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No sections were timed in this rerun")
+
+def sync_profiling_toggle():
+    """Persist the Settings toggle outside of widget state"""
+    st.session_state.profiling_enabled = st.session_state.profiling_toggle
+
+def sync_profile_mode():
+    """Persist the profile mode outside of widget state"""
+    st.session_state.profile_mode = st.session_state.profile_mode_select
+
+@st.cache_resource
+def response_store():
+    """Process-wide local copies of GET responses plus transfer counters"""
+    return {"lock": threading.Lock(), "entries": OrderedDict(), "counters": {}}
+
+def count_transfer(store, endpoint, outcome, num_bytes, parse_ms):
+    """Track requests, bytes transferred and parse time per endpoint"""
+    with store["lock"]:
+        counter = store["counters"].setdefault(endpoint, {
+            "requests": 0, "not_modified": 0, "delta": 0, "full": 0, "bytes": 0, "parse_ms": 0.0
+        })
+        counter["requests"] += 1
+        counter[outcome] += 1
+        counter["bytes"] += num_bytes
+        counter["parse_ms"] += parse_ms
+
+def merge_delta(local_data, delta_data, records_key, id_field):
+    """Apply a delta payload to a local copy, or return None if it can't be applied"""
+    records = {r.get(id_field): r for r in local_data.get(records_key, [])}
+    for record_id in delta_data.get("deleted", []):
+        records.pop(record_id, None)
+    changed = delta_data.get(records_key, [])
+    for record in changed:
+        records[record.get(id_field)] = record
+    
+    if "order" in delta_data:
+        # Records that moved onto this page without changing aren't in the delta
+        if any(record_id not in records for record_id in delta_data["order"]):
+            return None
+        merged_records = [records[record_id] for record_id in delta_data["order"]]
+    else:
+        known = set()
+        merged_records = []
+        for record in local_data.get(records_key, []) + changed:
+            record_id = record.get(id_field)
+            if record_id in records and record_id not in known:
+                known.add(record_id)
+                merged_records.append(records[record_id])
+    
+    merged = {k: v for k, v in delta_data.items() if k not in ("delta", "deleted", "order")}
+    merged[records_key] = merged_records
+    return merged
+
 # Helper function to make API calls
 def api_call(endpoint, method="GET", params=None, json_data=None, files=None):
     """Make API call to n8n webhook"""
+    with profile_span(f"{method} {endpoint}", kind="api"):
+        store = response_store() if CONDITIONAL_REQUESTS else None
+        return _api_call(endpoint, method=method, params=params, json_data=json_data, files=files, store=store)
+
+def _conditional_get(url, endpoint, params, store, allow_delta=True):
+    """GET that revalidates the local copy and merges delta payloads"""
+    key = (url, tuple(sorted((params or {}).items())))
+    with store["lock"]:
+        entry = store["entries"].get(key)
+        if entry is not None:
+            store["entries"].move_to_end(key)
+    
+    headers = {}
+    request_params = dict(params or {})
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        elif entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if allow_delta and entry["cursor"] is not None and endpoint in DELTA_ENDPOINTS:
+            request_params["since"] = entry["cursor"]
+    
+    response = requests.get(url, params=request_params, headers=headers, timeout=30)
+    num_bytes = int(response.headers.get("Content-Length") or len(response.content))
+    
+    if response.status_code == 304 and entry is not None:
+        count_transfer(store, endpoint, "not_modified", num_bytes, 0.0)
+        return entry["data"], None
+    if response.status_code != 200:
+        return None, f"API Error: {response.status_code} - {response.text}"
+    
+    parse_start = time.perf_counter()
+    data = response.json()
+    outcome = "full"
+    if isinstance(data, dict) and data.get("delta"):
+        records_key, id_field = DELTA_ENDPOINTS.get(endpoint, (None, None))
+        merged = None
+        if entry is not None and records_key:
+            merged = merge_delta(entry["data"], data, records_key, id_field)
+        if merged is None:
+            count_transfer(store, endpoint, "delta", num_bytes, (time.perf_counter() - parse_start) * 1000)
+            if not allow_delta:
+                return None, "API Error: received a delta response to a full request"
+            # The delta doesn't fit our copy; fall back to a full response once
+            return _conditional_get(url, endpoint, params, store, allow_delta=False)
+        data = merged
+        outcome = "delta"
+    count_transfer(store, endpoint, outcome, num_bytes, (time.perf_counter() - parse_start) * 1000)
+    
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    cursor = data.get("cursor") if isinstance(data, dict) else None
+    with store["lock"]:
+        if etag or last_modified or cursor is not None:
+            store["entries"][key] = {"data": data, "etag": etag, "last_modified": last_modified, "cursor": cursor}
+            store["entries"].move_to_end(key)
+            while len(store["entries"]) > RESPONSE_STORE_MAX_ENTRIES:
+                store["entries"].popitem(last=False)
+        else:
+            store["entries"].pop(key, None)
+    return data, None
+
+def _api_call(endpoint, method="GET", params=None, json_data=None, files=None, store=None):
     try:
         url = f"{N8N_WEBHOOK_URL}/{endpoint.lstrip('/')}"
         if method == "GET":
+            if store is not None:
+                return _conditional_get(url, endpoint.lstrip('/'), params, store)
             response = requests.get(url, params=params, timeout=30)
         elif method == "POST":
             if files:
@@ -48,32 +309,320 @@ def api_call(endpoint, method="GET", params=None, json_data=None, files=None):
     except Exception as e:
         return None, str(e)
 
-# Main title
-st.title("📞 AI-Caller Dashboard")
-st.markdown("---")
+# Helper functions for the daily recap
+def recap_today():
+    """Today's date in the business timezone"""
+    if RECAP_TIMEZONE:
+        return datetime.now(ZoneInfo(RECAP_TIMEZONE)).date()
+    return datetime.now().date()
 
-# Sidebar
-st.sidebar.title("Navigation")
-page = st.sidebar.radio(
-    "Go to",
-    ["Dashboard", "Leads", "Calls", "Campaigns", "Settings"]
-)
+def recap_is_closed(day, today):
+    """Whether a day's recap can no longer change and may be cached for good"""
+    return day < today - timedelta(days=RECAP_SETTLE_DAYS)
+
+def recap_cache_dir():
+    """Cache directory for the configured backend (recaps of different webhooks never mix)"""
+    backend = hashlib.sha1(N8N_WEBHOOK_URL.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(RECAP_CACHE_DIR, backend)
+
+def recap_cache_path(day):
+    """Path of the cached recap for a closed day"""
+    return os.path.join(recap_cache_dir(), f"{day.isoformat()}.json")
+
+def load_cached_recap(day):
+    """Load a closed day's recap from disk, if it was cached before"""
+    try:
+        with open(recap_cache_path(day), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_recap(day, recap_data):
+    """Cache a closed day's recap on disk (written atomically)"""
+    try:
+        os.makedirs(recap_cache_dir(), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=recap_cache_dir(), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(recap_data, f)
+        os.replace(tmp_path, recap_cache_path(day))
+    except OSError:
+        # The cache is an optimization only; the recap is still shown
+        pass
+
+def fetch_recap_range(start_date, end_date):
+    """Get recaps for every day in a range, fetching only what isn't cached"""
+    today = recap_today()
+    end_date = min(end_date, today)
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    
+    recaps = {}
+    missing = []
+    for day in days:
+        cached = load_cached_recap(day) if recap_is_closed(day, today) else None
+        if cached is not None:
+            recaps[day] = cached
+        else:
+            missing.append(day)
+    
+    errors = {}
+    if missing:
+        # Worker threads have no Streamlit script context, so they call
+        # _api_call directly with the shared response store; the whole
+        # batch is timed as one span instead
+        store = response_store() if CONDITIONAL_REQUESTS else None
+        def fetch_day(day):
+            return day, _api_call("api/recap", params={"date": day.isoformat()}, store=store)
+        
+        with profile_span(f"GET api/recap x{len(missing)}", kind="api"):
+            with ThreadPoolExecutor(max_workers=min(RECAP_FETCH_WORKERS, len(missing))) as executor:
+                results = list(executor.map(fetch_day, missing))
+        
+        for day, (recap_data, error) in results:
+            if not error and recap_data is not None and not isinstance(recap_data, dict):
+                # Anything but an object is a malformed response, never a day without calls
+                error = f"Unexpected recap response ({type(recap_data).__name__})"
+            if error:
+                errors[day] = error
+            else:
+                # A day without calls may come back empty; it is still a valid recap
+                recap_data = recap_data or {}
+                recaps[day] = recap_data
+                if recap_is_closed(day, today):
+                    save_cached_recap(day, recap_data)
+    
+    return recaps, errors, len(missing)
+
+def normalize_disposition_breakdown(breakdown):
+    """Turn a dispositionBreakdown payload into a {disposition: count} dict"""
+    if isinstance(breakdown, str):
+        try:
+            breakdown = json.loads(breakdown)
+        except ValueError:
+            return None
+    if isinstance(breakdown, dict):
+        return {str(k): v for k, v in breakdown.items() if isinstance(v, (int, float))}
+    if isinstance(breakdown, list):
+        counts = {}
+        for item in breakdown:
+            if not isinstance(item, dict):
+                return None
+            name = item.get("disposition") or item.get("name") or "Unknown"
+            count = item.get("count", item.get("total", 0))
+            if isinstance(count, (int, float)):
+                counts[str(name)] = counts.get(str(name), 0) + count
+        return counts
+    return None
+
+# Helper functions for compact session data and memory accounting
+def compact_frame(df, category_max_ratio=0.5):
+    """Downcast numeric columns and store repetitive text as categoricals"""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="float")
+        elif (pd.api.types.is_object_dtype(series) or isinstance(series.dtype, pd.StringDtype)) and len(series) > 0:
+            # pandas 3 stores text as the "str" dtype rather than object
+            if series.nunique(dropna=False) / len(series) <= category_max_ratio:
+                df[col] = series.astype("category")
+    return df
+
+def estimate_size(obj, _depth=0):
+    """Approximate the memory held by a value, in bytes"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(pd.Series(obj.memory_usage(index=True, deep=True)).sum())
+    size = sys.getsizeof(obj)
+    if _depth > 6:
+        return size
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(estimate_size(v, _depth + 1) for v in obj)
+    return size
+
+def format_bytes(num_bytes):
+    """Human readable byte count"""
+    if num_bytes is None:
+        return "N/A"
+    for unit in ["B", "KB", "MB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{int(num_bytes)} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+def process_rss_bytes():
+    """Resident memory of this Streamlit process (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+def session_key():
+    """Stable id for the current browser session"""
+    if "session_key" not in st.session_state:
+        st.session_state.session_key = uuid.uuid4().hex[:8]
+    return st.session_state.session_key
+
+def session_memory_usage():
+    """Approximate bytes held by each session state entry"""
+    return {str(k): estimate_size(v) for k, v in st.session_state.to_dict().items()}
+
+@st.cache_resource
+def session_registry():
+    """Process-wide memory accounting shared by all sessions"""
+    return {"lock": threading.Lock(), "sessions": {}}
+
+def page_cache():
+    """Per-session cache of fetched pages and upload previews (oldest first)"""
+    if "page_cache" not in st.session_state:
+        st.session_state.page_cache = OrderedDict()
+    return st.session_state.page_cache
+
+def page_cache_key(endpoint, params):
+    return (endpoint, tuple(sorted((params or {}).items())))
+
+def page_cache_get(key):
+    """Get a cached entry if it is still fresh"""
+    cache = page_cache()
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    if entry["ttl"] is not None and time.time() - entry["stored"] > entry["ttl"]:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return entry["value"]
+
+def page_cache_put(key, value, ttl=PAGE_CACHE_TTL):
+    """Cache an entry for this session (ttl=None keeps it until evicted)"""
+    cache = page_cache()
+    cache[key] = {"value": value, "stored": time.time(), "ttl": ttl}
+    cache.move_to_end(key)
+
+def page_cache_clear(endpoint=None):
+    """Drop cached pages for an endpoint (or everything) after a change"""
+    cache = page_cache()
+    for key in [k for k in cache if endpoint is None or k[0] == endpoint]:
+        del cache[key]
+
+def enforce_session_budget():
+    """Evict cached pages and previews until the session fits its budget"""
+    budget = SESSION_BUDGET_MB * 1024 * 1024
+    usage = session_memory_usage()
+    total = sum(usage.values())
+    cache = page_cache()
+    evicted = 0
+    while total > budget and cache:
+        _, entry = cache.popitem(last=False)
+        total -= estimate_size(entry)
+        evicted += 1
+    return total, evicted
+
+def record_session_memory(page_name, total_bytes):
+    """Report this session's usage to the process-wide registry"""
+    registry = session_registry()
+    now = time.time()
+    with registry["lock"]:
+        registry["sessions"][session_key()] = {
+            "bytes": total_bytes,
+            "page": page_name,
+            "cached_entries": len(page_cache()),
+            "last_seen": now
+        }
+        for key in [k for k, v in registry["sessions"].items() if now - v["last_seen"] > SESSION_STALE_SECONDS]:
+            del registry["sessions"][key]
+
+def fetch_page(endpoint, params, to_frame, records_key):
+    """Fetch a list page as a compact DataFrame, reusing the session's cached copy"""
+    key = page_cache_key(endpoint, params)
+    cached = page_cache_get(key)
+    if cached is not None:
+        return cached, None
+    
+    data, error = api_call(endpoint, params=params)
+    if error:
+        return None, error
+    if not data or not data.get(records_key):
+        return None, None
+    
+    with profile_span(f"{endpoint}: compact rows"):
+        page_data = {"frame": to_frame(data[records_key]), "pagination": data.get("pagination", {})}
+    page_cache_put(key, page_data)
+    return page_data, None
+
+LEAD_COLUMNS = ["Name", "Email", "Phone", "Company", "Status", "Calls", "Campaign"]
+
+def leads_frame(leads):
+    """Compact DataFrame of a leads page (lead_id kept for actions, not displayed)"""
+    rows = []
+    for lead in leads:
+        rows.append({
+            "lead_id": lead.get("lead_id", ""),
+            "Name": f"{lead.get('first_name', '')} {lead.get('last_name', '')}".strip(),
+            "Email": lead.get("email", ""),
+            "Phone": lead.get("mobile_phone", ""),
+            "Company": lead.get("company", ""),
+            "Status": lead.get("status", ""),
+            "Calls": lead.get("call_count", 0),
+            "Campaign": lead.get("campaign", {}).get("campaign_name", "") if lead.get("campaign") else ""
+        })
+    df = pd.DataFrame(rows, columns=["lead_id"] + LEAD_COLUMNS)
+    df["Calls"] = pd.to_numeric(df["Calls"], errors="coerce").fillna(0).astype("int64")
+    return compact_frame(df)
+
+def calls_frame(calls):
+    """Compact, typed DataFrame of a calls page"""
+    rows = []
+    for call in calls:
+        call_date = None
+        if call.get("call_date"):
+            try:
+                # Parse ISO date
+                call_date = datetime.fromisoformat(str(call["call_date"]).replace('Z', '+00:00')).replace(tzinfo=None)
+            except:
+                pass
+        rows.append({
+            "Date": call_date,
+            "Duration": call.get("duration", 0),
+            "Disposition": call.get("disposition", ""),
+            "Answered": "✅" if call.get("answered") else "❌",
+            "Cost": call.get("cost", 0)
+        })
+    df = pd.DataFrame(rows, columns=["Date", "Duration", "Disposition", "Answered", "Cost"])
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df["Duration"] = pd.to_numeric(df["Duration"], errors="coerce")
+    df["Cost"] = pd.to_numeric(df["Cost"], errors="coerce").fillna(0)
+    return compact_frame(df)
 
 # Dashboard Page
-if page == "Dashboard":
+def render_dashboard():
+    """Render the Dashboard page"""
     st.header("📊 Dashboard")
     
     # API Status
     st.subheader("System Status")
-    try:
-        # Test API connection with stats endpoint
-        data, error = api_call("api/stats-v2", params={"timeFrame": "last7days"})
-        if error:
-            st.error(f"❌ API Error: {error}")
-        else:
-            st.success("✅ API Connected")
-    except Exception as e:
-        st.error(f"❌ Connection Error: {str(e)}")
+    with profile_span("Dashboard: API status"):
+        try:
+            # Test API connection with stats endpoint
+            data, error = api_call("api/stats-v2", params={"timeFrame": "last7days"})
+            if error:
+                st.error(f"❌ API Error: {error}")
+            else:
+                st.success("✅ API Connected")
+        except Exception as e:
+            st.error(f"❌ Connection Error: {str(e)}")
     
     st.markdown("---")
     
@@ -123,29 +672,31 @@ if page == "Dashboard":
             campaign_data = stats_data["campaignBreakdown"]
             if campaign_data:
                 # Transform data for better UX - format column names and reorder
-                formatted_campaigns = []
-                for campaign in campaign_data:
-                    formatted_campaign = {}
-                    # Use campaign_name first, format other fields
-                    if "campaign_name" in campaign:
-                        formatted_campaign["Campaign"] = campaign.get("campaign_name", "")
-                    if "totalCalls" in campaign or "total_calls" in campaign:
-                        formatted_campaign["Total Calls"] = campaign.get("totalCalls") or campaign.get("total_calls", 0)
-                    if "connections" in campaign:
-                        formatted_campaign["Connections"] = campaign.get("connections", 0)
-                    if "conversations" in campaign:
-                        formatted_campaign["Conversations"] = campaign.get("conversations", 0)
-                    if "answerRate" in campaign or "answer_rate" in campaign:
-                        rate = campaign.get("answerRate") or campaign.get("answer_rate", 0)
-                        formatted_campaign["Answer Rate"] = f"{rate:.1f}%" if isinstance(rate, (int, float)) else rate
-                    if "totalCost" in campaign or "total_cost" in campaign:
-                        cost = campaign.get("totalCost") or campaign.get("total_cost", 0)
-                        formatted_campaign["Total Cost"] = f"${cost:.2f}" if isinstance(cost, (int, float)) else cost
-                    formatted_campaigns.append(formatted_campaign)
+                with profile_span("Dashboard: format campaigns"):
+                    formatted_campaigns = []
+                    for campaign in campaign_data:
+                        formatted_campaign = {}
+                        # Use campaign_name first, format other fields
+                        if "campaign_name" in campaign:
+                            formatted_campaign["Campaign"] = campaign.get("campaign_name", "")
+                        if "totalCalls" in campaign or "total_calls" in campaign:
+                            formatted_campaign["Total Calls"] = campaign.get("totalCalls") or campaign.get("total_calls", 0)
+                        if "connections" in campaign:
+                            formatted_campaign["Connections"] = campaign.get("connections", 0)
+                        if "conversations" in campaign:
+                            formatted_campaign["Conversations"] = campaign.get("conversations", 0)
+                        if "answerRate" in campaign or "answer_rate" in campaign:
+                            rate = campaign.get("answerRate") or campaign.get("answer_rate", 0)
+                            formatted_campaign["Answer Rate"] = f"{rate:.1f}%" if isinstance(rate, (int, float)) else rate
+                        if "totalCost" in campaign or "total_cost" in campaign:
+                            cost = campaign.get("totalCost") or campaign.get("total_cost", 0)
+                            formatted_campaign["Total Cost"] = f"${cost:.2f}" if isinstance(cost, (int, float)) else cost
+                        formatted_campaigns.append(formatted_campaign)
                 
                 if formatted_campaigns:
                     df_campaigns = pd.DataFrame(formatted_campaigns)
-                    st.dataframe(df_campaigns, use_container_width=True)
+                    with profile_span("Dashboard: render campaign table"):
+                        st.dataframe(df_campaigns, use_container_width=True)
         
         # Recent Calls
         if stats_data.get("recentCalls"):
@@ -153,110 +704,171 @@ if page == "Dashboard":
             recent_calls = stats_data["recentCalls"]
             if recent_calls:
                 # Transform data for better UX - format column names, dates, and values
-                formatted_calls = []
-                for call in recent_calls:
-                    formatted_call = {}
+                with profile_span("Dashboard: format recent calls"):
+                    formatted_calls = []
+                    for call in recent_calls:
+                        formatted_call = {}
                     
-                    # Add lead information if available
-                    # Check if lead info is nested or flat
-                    lead_info = call.get("lead") or {}
-                    if not lead_info and (call.get("first_name") or call.get("lead_first_name")):
-                        # Lead info might be at top level
-                        lead_info = {
-                            "first_name": call.get("first_name") or call.get("lead_first_name", ""),
-                            "last_name": call.get("last_name") or call.get("lead_last_name", ""),
-                            "company": call.get("company") or call.get("lead_company", ""),
-                            "email": call.get("email") or call.get("lead_email", ""),
-                            "mobile_phone": call.get("mobile_phone") or call.get("lead_phone", "")
-                        }
+                        # Add lead information if available
+                        # Check if lead info is nested or flat
+                        lead_info = call.get("lead") or {}
+                        if not lead_info and (call.get("first_name") or call.get("lead_first_name")):
+                            # Lead info might be at top level
+                            lead_info = {
+                                "first_name": call.get("first_name") or call.get("lead_first_name", ""),
+                                "last_name": call.get("last_name") or call.get("lead_last_name", ""),
+                                "company": call.get("company") or call.get("lead_company", ""),
+                                "email": call.get("email") or call.get("lead_email", ""),
+                                "mobile_phone": call.get("mobile_phone") or call.get("lead_phone", "")
+                            }
                     
-                    # Add lead name
-                    if lead_info:
-                        first_name = lead_info.get("first_name", "")
-                        last_name = lead_info.get("last_name", "")
-                        name = f"{first_name} {last_name}".strip()
-                        formatted_call["Name"] = name if name else "Unknown"
+                        # Add lead name
+                        if lead_info:
+                            first_name = lead_info.get("first_name", "")
+                            last_name = lead_info.get("last_name", "")
+                            name = f"{first_name} {last_name}".strip()
+                            formatted_call["Name"] = name if name else "Unknown"
                         
-                        # Add company if available
-                        company = lead_info.get("company", "")
-                        formatted_call["Company"] = company if company else "-"
-                    else:
-                        formatted_call["Name"] = "-"
-                        formatted_call["Company"] = "-"
+                            # Add company if available
+                            company = lead_info.get("company", "")
+                            formatted_call["Company"] = company if company else "-"
+                        else:
+                            formatted_call["Name"] = "-"
+                            formatted_call["Company"] = "-"
                     
-                    # Format date
-                    call_date = call.get("call_date") or call.get("callDate") or ""
-                    if call_date:
-                        try:
-                            dt = datetime.fromisoformat(str(call_date).replace('Z', '+00:00'))
-                            formatted_call["Date"] = dt.strftime("%Y-%m-%d %H:%M")
-                        except:
-                            formatted_call["Date"] = str(call_date)
-                    else:
-                        formatted_call["Date"] = ""
+                        # Format date
+                        call_date = call.get("call_date") or call.get("callDate") or ""
+                        if call_date:
+                            try:
+                                dt = datetime.fromisoformat(str(call_date).replace('Z', '+00:00'))
+                                formatted_call["Date"] = dt.strftime("%Y-%m-%d %H:%M")
+                            except:
+                                formatted_call["Date"] = str(call_date)
+                        else:
+                            formatted_call["Date"] = ""
                     
-                    # Format duration
-                    duration = call.get("duration", 0)
-                    if isinstance(duration, (int, float)):
-                        if duration < 60:
-                            formatted_call["Duration"] = f"{int(duration)}s"
+                        # Format duration
+                        duration = call.get("duration", 0)
+                        if isinstance(duration, (int, float)):
+                            if duration < 60:
+                                formatted_call["Duration"] = f"{int(duration)}s"
+                            else:
+                                minutes = int(duration // 60)
+                                seconds = int(duration % 60)
+                                formatted_call["Duration"] = f"{minutes}m {seconds}s"
                         else:
-                            minutes = int(duration // 60)
-                            seconds = int(duration % 60)
-                            formatted_call["Duration"] = f"{minutes}m {seconds}s"
-                    else:
-                        formatted_call["Duration"] = str(duration)
+                            formatted_call["Duration"] = str(duration)
                     
-                    # Format disposition
-                    formatted_call["Status"] = call.get("disposition", "") or "Unknown"
+                        # Format disposition
+                        formatted_call["Status"] = call.get("disposition", "") or "Unknown"
                     
-                    # Format answered
-                    answered = call.get("answered") or call.get("isAnswered", False)
-                    formatted_call["Answered"] = "✅ Yes" if answered else "❌ No"
+                        # Format answered
+                        answered = call.get("answered") or call.get("isAnswered", False)
+                        formatted_call["Answered"] = "✅ Yes" if answered else "❌ No"
                     
-                    # Format cost
-                    cost = call.get("cost") or call.get("callCost", 0)
-                    if isinstance(cost, (int, float)):
-                        formatted_call["Cost"] = f"${cost:.2f}"
-                    else:
-                        formatted_call["Cost"] = str(cost)
+                        # Format cost
+                        cost = call.get("cost") or call.get("callCost", 0)
+                        if isinstance(cost, (int, float)):
+                            formatted_call["Cost"] = f"${cost:.2f}"
+                        else:
+                            formatted_call["Cost"] = str(cost)
                     
-                    formatted_calls.append(formatted_call)
+                        formatted_calls.append(formatted_call)
                 
                 if formatted_calls:
                     df_recent = pd.DataFrame(formatted_calls)
-                    st.dataframe(df_recent, use_container_width=True)
+                    with profile_span("Dashboard: render recent calls"):
+                        st.dataframe(df_recent, use_container_width=True)
         
         # Daily Recap Section
         st.markdown("---")
         st.subheader("📅 Daily Recap")
-        recap_date = st.date_input("Select Date", value=datetime.now().date(), key="recap_date")
+        today = recap_today()
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            recap_days = st.selectbox("Range", ["Single day", "Last 7 days", "Last 30 days", "Custom range"], index=0, key="recap_range_preset")
+        with col2:
+            if recap_days == "Single day":
+                recap_date = st.date_input("Select Date", value=today, max_value=today, key="recap_date")
+                recap_range = (recap_date, recap_date)
+            elif recap_days == "Custom range":
+                recap_range = st.date_input("Select Dates", value=(today - timedelta(days=13), today), max_value=today, key="recap_custom_range")
+            else:
+                span_days = 7 if recap_days == "Last 7 days" else 30
+                recap_range = (today - timedelta(days=span_days - 1), today)
+                st.caption(f"{recap_range[0].isoformat()} to {recap_range[1].isoformat()}")
         
         if st.button("Get Recap", key="get_recap"):
-            with st.spinner("Loading recap..."):
-                recap_data, error = api_call("api/recap", params={"date": recap_date.isoformat()})
-            
-            if error:
-                st.error(f"Error loading recap: {error}")
-            elif recap_data:
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total Calls", recap_data.get("totalCalls", 0))
-                with col2:
-                    st.metric("Connections", recap_data.get("connections", 0))
-                with col3:
-                    st.metric("Conversations", recap_data.get("conversations", 0))
-                with col4:
-                    st.metric("Total Cost", f"${recap_data.get('totalCost', 0):.2f}")
+            if not isinstance(recap_range, (list, tuple)) or len(recap_range) != 2:
+                st.warning("Please select both a start and an end date")
+            else:
+                with st.spinner("Loading recap..."):
+                    recaps, errors, fetched = fetch_recap_range(recap_range[0], recap_range[1])
+                
+                for day, error in sorted(errors.items()):
+                    st.error(f"Error loading recap for {day.isoformat()}: {error}")
                 
-                if recap_data.get("dispositionBreakdown"):
-                    st.markdown("**Disposition Breakdown:**")
-                    st.text(recap_data["dispositionBreakdown"])
+                if recaps:
+                    with profile_span("Dashboard: render recap"):
+                        days = sorted(recaps)
+                        df_recap = pd.DataFrame([
+                            {
+                                "Date": pd.Timestamp(day),
+                                "Total Calls": recaps[day].get("totalCalls", 0) or 0,
+                                "Connections": recaps[day].get("connections", 0) or 0,
+                                "Conversations": recaps[day].get("conversations", 0) or 0,
+                                "Total Cost": recaps[day].get("totalCost", 0) or 0
+                            }
+                            for day in days
+                        ]).set_index("Date")
+                        
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Total Calls", f"{int(df_recap['Total Calls'].sum()):,}")
+                        with col2:
+                            st.metric("Connections", f"{int(df_recap['Connections'].sum()):,}")
+                        with col3:
+                            st.metric("Conversations", f"{int(df_recap['Conversations'].sum()):,}")
+                        with col4:
+                            st.metric("Total Cost", f"${df_recap['Total Cost'].sum():.2f}")
+                        
+                        if len(days) > 1:
+                            st.line_chart(df_recap[["Total Calls", "Connections", "Conversations"]])
+                            st.bar_chart(df_recap[["Total Cost"]])
+                        
+                        # Disposition breakdown as one column per disposition
+                        dispositions = {}
+                        for day in days:
+                            breakdown = recaps[day].get("dispositionBreakdown")
+                            if breakdown:
+                                normalized = normalize_disposition_breakdown(breakdown)
+                                if normalized is None:
+                                    st.markdown(f"**Disposition Breakdown ({day.isoformat()}):**")
+                                    st.text(breakdown)
+                                elif normalized:
+                                    dispositions[pd.Timestamp(day)] = normalized
+                        
+                        if dispositions:
+                            df_dispositions = pd.DataFrame.from_dict(dispositions, orient="index").fillna(0).sort_index()
+                            df_dispositions.index.name = "Date"
+                            st.markdown("**Disposition Breakdown:**")
+                            if len(df_dispositions) > 1:
+                                st.bar_chart(df_dispositions)
+                            else:
+                                st.bar_chart(df_dispositions.T.set_axis(["Calls"], axis=1))
+                        
+                        df_table = df_recap.join(df_dispositions) if dispositions else df_recap
+                        df_table = df_table.sort_index(ascending=False)
+                        df_table.index = df_table.index.strftime("%Y-%m-%d")
+                        st.dataframe(df_table, use_container_width=True)
+                    
+                    st.caption(f"{len(days)} days shown, {fetched} fetched from the API (closed days are cached)")
     else:
         st.warning("No stats data available")
 
 # Leads Page
-elif page == "Leads":
+def render_leads():
+    """Render the Leads page"""
     st.header("👥 Leads Management")
     
     # Tabs for different lead operations
@@ -287,7 +899,7 @@ elif page == "Leads":
         
         st.markdown("---")
         
-        # Fetch leads
+        # Fetch leads (pages are cached briefly so widget reruns don't refetch)
         params = {
             "page": st.session_state.leads_page,
             "limit": 50
@@ -298,32 +910,20 @@ elif page == "Leads":
             params["status"] = status_filter
         
         with st.spinner("Loading leads..."):
-            leads_data, error = api_call("api/leads", params=params)
+            leads_page_data, error = fetch_page("api/leads", params, leads_frame, "leads")
         
         if error:
             st.error(f"Error loading leads: {error}")
-        elif leads_data and leads_data.get("leads"):
-            leads = leads_data["leads"]
-            pagination = leads_data.get("pagination", {})
+        elif leads_page_data:
+            df_leads = leads_page_data["frame"]
+            pagination = leads_page_data["pagination"]
             
             st.subheader(f"Leads List ({pagination.get('total', 0)} total)")
             
-            if leads:
-                # Prepare data for display (removed technical IDs for better UX)
-                display_data = []
-                for lead in leads:
-                    display_data.append({
-                        "Name": f"{lead.get('first_name', '')} {lead.get('last_name', '')}".strip(),
-                        "Email": lead.get("email", ""),
-                        "Phone": lead.get("mobile_phone", ""),
-                        "Company": lead.get("company", ""),
-                        "Status": lead.get("status", ""),
-                        "Calls": lead.get("call_count", 0),
-                        "Campaign": lead.get("campaign", {}).get("campaign_name", "") if lead.get("campaign") else ""
-                    })
-                
-                df = pd.DataFrame(display_data)
-                st.dataframe(df, use_container_width=True)
+            if not df_leads.empty:
+                # Display without technical IDs for better UX
+                with profile_span("Leads: render table"):
+                    st.dataframe(df_leads, use_container_width=True, column_order=LEAD_COLUMNS)
                 
                 # Pagination info
                 col1, col2, col3 = st.columns([1, 1, 1])
@@ -346,14 +946,11 @@ elif page == "Leads":
                 st.caption("💡 Select a lead from the list above, then choose an action below")
                 
                 # Create a user-friendly lead selector
-                lead_options = ["-- Select a Lead --"] + [
-                    f"{lead.get('first_name', '')} {lead.get('last_name', '')} ({lead.get('email', 'No email')})".strip()
-                    for lead in leads
-                ]
                 lead_ids_map = {}
-                for lead in leads:
-                    display_name = f"{lead.get('first_name', '')} {lead.get('last_name', '')} ({lead.get('email', 'No email')})".strip()
-                    lead_ids_map[display_name] = lead.get("lead_id", "")
+                for lead in df_leads.itertuples(index=False):
+                    display_name = f"{lead.Name} ({lead.Email or 'No email'})".strip()
+                    lead_ids_map[display_name] = lead.lead_id
+                lead_options = ["-- Select a Lead --"] + list(lead_ids_map)
                 
                 selected_lead_display = st.selectbox(
                     "Select Lead",
@@ -369,19 +966,19 @@ elif page == "Leads":
                 
                 # Show selected lead info if one is selected
                 if selected_lead_id:
-                    selected_lead = next((l for l in leads if l.get("lead_id") == selected_lead_id), None)
-                    if selected_lead:
+                    matches = df_leads[df_leads["lead_id"] == selected_lead_id]
+                    if not matches.empty:
+                        selected_lead = matches.iloc[0]
                         with st.expander(f"📋 Lead Details: {selected_lead_display}", expanded=False):
                             col1, col2 = st.columns(2)
                             with col1:
-                                st.write(f"**Email:** {selected_lead.get('email', 'N/A')}")
-                                st.write(f"**Phone:** {selected_lead.get('mobile_phone', 'N/A')}")
-                                st.write(f"**Company:** {selected_lead.get('company', 'N/A')}")
+                                st.write(f"**Email:** {selected_lead['Email'] or 'N/A'}")
+                                st.write(f"**Phone:** {selected_lead['Phone'] or 'N/A'}")
+                                st.write(f"**Company:** {selected_lead['Company'] or 'N/A'}")
                             with col2:
-                                st.write(f"**Status:** {selected_lead.get('status', 'N/A')}")
-                                st.write(f"**Calls Made:** {selected_lead.get('call_count', 0)}")
-                                campaign_name = selected_lead.get("campaign", {}).get("campaign_name", "") if selected_lead.get("campaign") else "None"
-                                st.write(f"**Campaign:** {campaign_name}")
+                                st.write(f"**Status:** {selected_lead['Status'] or 'N/A'}")
+                                st.write(f"**Calls Made:** {selected_lead['Calls']}")
+                                st.write(f"**Campaign:** {selected_lead['Campaign'] or 'None'}")
                 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -392,6 +989,8 @@ elif page == "Leads":
                             if error:
                                 st.error(f"Error: {error}")
                             elif result:
+                                page_cache_clear("api/leads")
+                                page_cache_clear("api/calls")
                                 st.success(f"Call initiated! Call ID: {result.get('call_id', 'N/A')}")
                         else:
                             st.warning("Please select a lead first")
@@ -406,6 +1005,7 @@ elif page == "Leads":
                                 st.error(f"Error: {error}")
                             elif result:
                                 st.success("Lead updated successfully!")
+                                page_cache_clear("api/leads")
                                 st.rerun()
                         else:
                             st.warning("Please select a lead first")
@@ -429,6 +1029,7 @@ elif page == "Leads":
                                 elif result:
                                     st.success("Lead deleted successfully!")
                                     st.session_state.confirm_delete = False
+                                    page_cache_clear("api/leads")
                                     st.rerun()
                         else:
                             st.warning("Please select a lead first")
@@ -488,6 +1089,7 @@ elif page == "Leads":
                         st.error(f"Error creating lead: {error}")
                     elif result:
                         st.success(f"Lead created successfully! Lead ID: {result.get('lead', {}).get('lead_id', 'N/A')}")
+                        page_cache_clear("api/leads")
                         st.rerun()
     
     # Tab 3: Upload CSV
@@ -498,21 +1100,27 @@ elif page == "Leads":
         uploaded_file = st.file_uploader("Choose CSV file", type="csv", key="csv_upload")
         
         if uploaded_file:
-            # Read CSV to show preview
+            # Read only the header and a preview; the file itself stays in the upload handle
             try:
-                df_preview = pd.read_csv(uploaded_file, nrows=5)
+                preview_key = ("upload_preview", getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}")
+                csv_preview = page_cache_get(preview_key)
+                if csv_preview is None:
+                    with profile_span("Upload: preview read_csv"):
+                        uploaded_file.seek(0)
+                        df_preview = pd.read_csv(uploaded_file, nrows=5)
+                    csv_preview = {"frame": df_preview, "columns": df_preview.columns.tolist()}
+                    page_cache_put(preview_key, csv_preview, ttl=None)
+                df_preview = csv_preview["frame"]
+                csv_columns = csv_preview["columns"]
+                
                 st.subheader("CSV Preview (first 5 rows)")
-                st.dataframe(df_preview)
+                with profile_span("Upload: render preview"):
+                    st.dataframe(df_preview)
                 
                 st.markdown("---")
                 st.subheader("Column Mapping")
                 st.caption("Map your CSV columns to database fields")
                 
-                # Get available columns
-                uploaded_file.seek(0)
-                df_full = pd.read_csv(uploaded_file)
-                csv_columns = df_full.columns.tolist()
-                
                 # Mapping form
                 with st.form("csv_mapping_form"):
                     mapping = {}
@@ -541,13 +1149,12 @@ elif page == "Leads":
                         if not clean_mapping:
                             st.error("Please map at least one column")
                         else:
-                            # Read CSV content
-                            uploaded_file.seek(0)
-                            csv_content = uploaded_file.read().decode('utf-8')
-                            
-                            # Prepare request
+                            # Prepare request (the CSV text is only decoded for the upload itself)
+                            with profile_span("Upload: read file"):
+                                uploaded_file.seek(0)
+                                csv_text = uploaded_file.read().decode('utf-8')
                             request_data = {
-                                "csv": csv_content,
+                                "csv": csv_text,
                                 "mapping": clean_mapping,
                                 "options": {
                                     "skipDuplicates": skip_duplicates
@@ -559,17 +1166,20 @@ elif page == "Leads":
                             
                             with st.spinner("Uploading CSV..."):
                                 result, error = api_call("api/csv-upload-flexible", method="POST", json_data=request_data)
+                            del csv_text, request_data
                             
                             if error:
                                 st.error(f"Error uploading CSV: {error}")
                             elif result:
+                                page_cache_clear("api/leads")
                                 st.success(f"CSV uploaded successfully!")
                                 st.json(result)
             except Exception as e:
                 st.error(f"Error reading CSV: {str(e)}")
 
 # Calls Page
-elif page == "Calls":
+def render_calls():
+    """Render the Calls page"""
     st.header("📞 Call History")
     
     # Initialize page number in session state if not exists
@@ -613,39 +1223,28 @@ elif page == "Calls":
         params["disposition"] = call_status
     
     with st.spinner("Loading calls..."):
-        calls_data, error = api_call("api/calls", params=params)
+        calls_page_data, error = fetch_page("api/calls", params, calls_frame, "calls")
     
     if error:
         st.error(f"Error loading calls: {error}")
-    elif calls_data and calls_data.get("calls"):
-        calls = calls_data["calls"]
-        pagination = calls_data.get("pagination", {})
+    elif calls_page_data:
+        df_calls = calls_page_data["frame"]
+        pagination = calls_page_data["pagination"]
         
         st.subheader(f"Recent Calls ({pagination.get('total', 0)} total)")
         
-        if calls:
-            # Prepare data for display
-            display_data = []
-            for call in calls:
-                call_date = call.get("call_date", "")
-                if call_date:
-                    try:
-                        # Parse ISO date
-                        dt = datetime.fromisoformat(call_date.replace('Z', '+00:00'))
-                        call_date = dt.strftime("%Y-%m-%d %H:%M")
-                    except:
-                        pass
-                
-                display_data.append({
-                    "Date": call_date,
-                    "Duration": f"{call.get('duration', 0)}s",
-                    "Disposition": call.get("disposition", ""),
-                    "Answered": "✅" if call.get("answered") else "❌",
-                    "Cost": f"${call.get('cost', 0):.2f}"
-                })
-            
-            df = pd.DataFrame(display_data)
-            st.dataframe(df, use_container_width=True)
+        if not df_calls.empty:
+            # Values stay typed in the frame and are only formatted for display
+            with profile_span("Calls: render table"):
+                st.dataframe(
+                    df_calls,
+                    use_container_width=True,
+                    column_config={
+                        "Date": st.column_config.DatetimeColumn("Date", format="YYYY-MM-DD HH:mm"),
+                        "Duration": st.column_config.NumberColumn("Duration", format="%ds"),
+                        "Cost": st.column_config.NumberColumn("Cost", format="$%.2f")
+                    }
+                )
             
             # Pagination
             col1, col2, col3 = st.columns([1, 1, 1])
@@ -667,7 +1266,8 @@ elif page == "Calls":
         st.info("📋 No call history available. Connect to your n8n workflow to load data.")
 
 # Campaigns Page
-elif page == "Campaigns":
+def render_campaigns():
+    """Render the Campaigns page"""
     st.header("📈 Campaigns")
     
     include_stats = st.checkbox("Include Statistics", value=True, key="campaigns_stats")
@@ -692,27 +1292,29 @@ elif page == "Campaigns":
         
         st.subheader(f"Active Campaigns ({len(campaigns)} total)")
         
-        for campaign in campaigns:
-            with st.expander(f"📋 {campaign.get('campaign_name', 'Unnamed Campaign')}"):
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**Sequence Template:** {campaign.get('sequence_template', 'N/A')}")
-                    st.write(f"**Max Calls:** {campaign.get('max_calls', 'N/A')}")
-                    st.write(f"**Duration (Weeks):** {campaign.get('duration_weeks', 'N/A')}")
-                    st.write(f"**Active:** {'✅' if campaign.get('is_active') else '❌'}")
+        with profile_span("Campaigns: render"):
+            for campaign in campaigns:
+                with st.expander(f"📋 {campaign.get('campaign_name', 'Unnamed Campaign')}"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.write(f"**Sequence Template:** {campaign.get('sequence_template', 'N/A')}")
+                        st.write(f"**Max Calls:** {campaign.get('max_calls', 'N/A')}")
+                        st.write(f"**Duration (Weeks):** {campaign.get('duration_weeks', 'N/A')}")
+                        st.write(f"**Active:** {'✅' if campaign.get('is_active') else '❌'}")
                 
-                with col2:
-                    if campaign.get("stats"):
-                        stats = campaign["stats"]
-                        st.write("**Statistics:**")
-                        st.write(f"- Total Leads: {stats.get('total_leads', 0)}")
-                        st.write(f"- Active Leads: {stats.get('active_leads', 0)}")
-                        st.write(f"- Completed Leads: {stats.get('completed_leads', 0)}")
+                    with col2:
+                        if campaign.get("stats"):
+                            stats = campaign["stats"]
+                            st.write("**Statistics:**")
+                            st.write(f"- Total Leads: {stats.get('total_leads', 0)}")
+                            st.write(f"- Active Leads: {stats.get('active_leads', 0)}")
+                            st.write(f"- Completed Leads: {stats.get('completed_leads', 0)}")
     else:
         st.info("📋 No campaigns available.")
 
 # Settings Page
-elif page == "Settings":
+def render_settings():
+    """Render the Settings page"""
     st.header("⚙️ Settings")
     
     st.subheader("API Configuration")
@@ -727,6 +1329,97 @@ elif page == "Settings":
     
     st.markdown("---")
     
+    st.subheader("Profiling")
+    if PROFILING_ENV_ENABLED:
+        st.info("Profiling is enabled for all sessions by the AI_CALLER_PROFILE environment variable")
+    else:
+        st.checkbox(
+            "Enable profiling for this session",
+            value=st.session_state.get("profiling_enabled", False),
+            key="profiling_toggle",
+            on_change=sync_profiling_toggle,
+            help="Times each page section and API call and shows a waterfall at the bottom of the page"
+        )
+    current_mode = st.session_state.get("profile_mode", PROFILE_MODES[0])
+    st.selectbox(
+        "Profile Mode",
+        PROFILE_MODES,
+        index=PROFILE_MODES.index(current_mode),
+        key="profile_mode_select",
+        on_change=sync_profile_mode,
+        help="cProfile captures every function call of the rerun and adds noticeable overhead"
+    )
+    st.caption(f"The last {PROFILE_HISTORY_SIZE} profiled reruns are kept and can be downloaded below each page")
+    
+    st.markdown("---")
+    
+    st.subheader("Memory")
+    usage = session_memory_usage()
+    registry = session_registry()
+    with registry["lock"]:
+        sessions = dict(registry["sessions"])
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Process RSS", format_bytes(process_rss_bytes()))
+    with col2:
+        st.metric("This Session", format_bytes(sum(usage.values())), help=f"Budget: {SESSION_BUDGET_MB:g} MB (AI_CALLER_SESSION_BUDGET_MB)")
+    with col3:
+        st.metric("Sessions (last hour)", len(sessions), help="Sessions seen in the last hour, including closed tabs")
+    
+    if sessions:
+        st.markdown("**Largest Sessions:**")
+        largest = sorted(sessions.items(), key=lambda item: item[1]["bytes"], reverse=True)[:10]
+        df_sessions = pd.DataFrame([
+            {
+                "Session": key + (" (you)" if key == session_key() else ""),
+                "Memory": format_bytes(info["bytes"]),
+                "Cached Entries": info["cached_entries"],
+                "Page": info["page"],
+                "Last Seen": datetime.fromtimestamp(info["last_seen"]).strftime("%H:%M:%S")
+            }
+            for key, info in largest
+        ])
+        st.dataframe(df_sessions, use_container_width=True, hide_index=True)
+    
+    with st.expander("This session's state"):
+        df_usage = pd.DataFrame(
+            [{"Key": k, "Memory": format_bytes(v), "Bytes": v} for k, v in sorted(usage.items(), key=lambda item: item[1], reverse=True)]
+        )
+        st.dataframe(df_usage, use_container_width=True, hide_index=True)
+        if st.button("Clear cached pages and previews", key="clear_page_cache"):
+            page_cache_clear()
+            st.rerun()
+    
+    st.markdown("---")
+    
+    st.subheader("API Transfer")
+    st.caption("GET responses are revalidated with ETag/Last-Modified; leads and campaigns also accept delta payloads since a cursor")
+    store = response_store()
+    with store["lock"]:
+        counters = {endpoint: dict(counter) for endpoint, counter in store["counters"].items()}
+        stored_entries = len(store["entries"])
+    if counters:
+        df_transfer = pd.DataFrame([
+            {
+                "Endpoint": endpoint,
+                "Requests": counter["requests"],
+                "Full": counter["full"],
+                "Not Modified": counter["not_modified"],
+                "Delta": counter["delta"],
+                "Transferred": format_bytes(counter["bytes"]),
+                "Parse Time (ms)": round(counter["parse_ms"], 1)
+            }
+            for endpoint, counter in sorted(counters.items())
+        ])
+        st.dataframe(df_transfer, use_container_width=True, hide_index=True)
+    if CONDITIONAL_REQUESTS:
+        st.caption(f"{stored_entries} responses kept locally (max {RESPONSE_STORE_MAX_ENTRIES})")
+    else:
+        st.caption("Conditional requests are disabled by AI_CALLER_CONDITIONAL_REQUESTS")
+    
+    st.markdown("---")
+    
     st.subheader("Available API Endpoints")
     st.code("""
     GET  /api/stats-v2              - Get dashboard statistics
@@ -760,6 +1453,86 @@ elif page == "Settings":
     All endpoints are connected to your n8n workflows.
     """)
 
-# Footer
-st.markdown("---")
-st.caption("AI-Caller Dashboard | Powered by Streamlit & n8n")
+# The page body runs in try/finally so the rerun is recorded and the profiler
+# is disabled even when it ends early with st.rerun()
+start_rerun_profile()
+page = None
+rerun_completed = False
+try:
+    # Main title
+    st.title("📞 AI-Caller Dashboard")
+    st.markdown("---")
+
+    # Sidebar
+    st.sidebar.title("Navigation")
+    page = st.sidebar.radio(
+        "Go to",
+        ["Dashboard", "Leads", "Calls", "Campaigns", "Settings"]
+    )
+
+    if page == "Dashboard":
+        render_dashboard()
+    elif page == "Leads":
+        render_leads()
+    elif page == "Calls":
+        render_calls()
+    elif page == "Campaigns":
+        render_campaigns()
+    elif page == "Settings":
+        render_settings()
+
+    # Footer
+    st.markdown("---")
+    st.caption("AI-Caller Dashboard | Powered by Streamlit & n8n")
+
+    # Memory accounting (evicts cached pages and previews over the session budget)
+    with profile_span("Memory accounting"):
+        session_bytes, evicted_entries = enforce_session_budget()
+        record_session_memory(page, session_bytes)
+    if evicted_entries:
+        st.caption(f"Freed {evicted_entries} cached pages/previews to stay within the {SESSION_BUDGET_MB:g} MB session budget")
+    rerun_completed = True
+finally:
+    profile_record = finish_rerun_profile(page, completed=rerun_completed)
+
+# Profiling overlay
+if profile_record:
+    with st.expander("⏱️ Rerun Profile", expanded=True):
+        render_profile_waterfall(profile_record)
+        
+        history = list(st.session_state.profile_history)
+        st.caption(f"{len(history)} profiled reruns kept for this session")
+        history_summary = [
+            {
+                "Time": r["timestamp"],
+                "Page": r["page"],
+                "Total (ms)": round(r["total_ms"], 1),
+                "Ended": "completed" if r["completed"] else "st.rerun() / stopped"
+            }
+            for r in reversed(history)
+        ]
+        st.dataframe(pd.DataFrame(history_summary), use_container_width=True, hide_index=True)
+        
+        export = [{k: v for k, v in r.items() if k != "pstats"} for r in history]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Download timing spans (JSON)",
+                data=json.dumps(export, indent=2),
+                file_name="ai-caller-rerun-spans.json",
+                mime="application/json",
+                key="download_profile_spans"
+            )
+        with col2:
+            profiled = [r for r in history if r["pstats"]]
+            if profiled:
+                labels = [f"{r['timestamp']} - {r['page']}" for r in profiled]
+                selected = st.selectbox("cProfile capture", labels, index=len(labels) - 1, key="profile_capture_select")
+                chosen = profiled[labels.index(selected)]
+                st.download_button(
+                    "Download cProfile (.pstats)",
+                    data=chosen["pstats"],
+                    file_name=f"ai-caller-{chosen['page'].lower()}-{chosen['timestamp'].replace(':', '')}.pstats",
+                    mime="application/octet-stream",
+                    key="download_profile_pstats"
+                )
@@ -0,0 +1,365 @@
+"""
+AI-Caller - Mock n8n webhook for local development and load testing
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+STATUSES = ["New", "Calling", "Completed", "DNC", "Pending"]
+DISPOSITIONS = ["Answered", "No Answer", "Busy", "Interested", "Not Interested"]
+
+# List endpoints that can answer with only the records changed since a cursor
+DELTA_LISTS = {
+    "api/leads": ("leads", "lead_id"),
+    "api/get-campaigns": ("campaigns", "campaign_id")
+}
+
+
+def build_dataset(num_leads=500, num_calls=2000, num_campaigns=10, seed=42):
+    """Generate a deterministic set of campaigns, leads and calls"""
+    rng = random.Random(seed)
+    campaigns = [
+        {
+            "campaign_id": f"camp-{i}",
+            "campaign_name": f"Campaign {i}",
+            "sequence_template": rng.choice(["standard", "aggressive", "nurture"]),
+            "max_calls": rng.choice([3, 5, 8]),
+            "duration_weeks": rng.choice([2, 4, 6]),
+            "is_active": rng.random() > 0.2
+        }
+        for i in range(1, num_campaigns + 1)
+    ]
+    leads = []
+    for i in range(1, num_leads + 1):
+        campaign = rng.choice(campaigns)
+        leads.append({
+            "lead_id": f"lead-{i}",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "email": f"lead{i}@example.com",
+            "mobile_phone": f"+1555{i:07d}",
+            "company": f"Company {i % 75}",
+            "status": rng.choice(STATUSES),
+            "call_count": rng.randint(0, 8),
+            "campaign": {"campaign_id": campaign["campaign_id"], "campaign_name": campaign["campaign_name"]}
+        })
+    now = datetime.now()
+    calls = []
+    for i in range(1, num_calls + 1):
+        lead = rng.choice(leads)
+        disposition = rng.choice(DISPOSITIONS)
+        calls.append({
+            "call_id": f"call-{i}",
+            "lead_id": lead["lead_id"],
+            "lead": {k: lead[k] for k in ("first_name", "last_name", "company", "email", "mobile_phone")},
+            "call_date": (now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))).isoformat() + "Z",
+            "duration": rng.randint(0, 600),
+            "disposition": disposition,
+            "answered": disposition != "No Answer",
+            "cost": round(rng.uniform(0.05, 2.5), 2)
+        })
+    calls.sort(key=lambda call: call["call_date"], reverse=True)
+    return {"campaigns": campaigns, "leads": leads, "calls": calls}
+
+
+def paginate(items, query):
+    """Slice a list using page/limit query parameters"""
+    page = max(1, int(query.get("page", 1)))
+    limit = max(1, int(query.get("limit", 50)))
+    total = len(items)
+    total_pages = max(1, (total + limit - 1) // limit)
+    start = (page - 1) * limit
+    return items[start:start + limit], {
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "totalPages": total_pages,
+        "hasMore": page < total_pages
+    }
+
+
+def summarize_calls(calls):
+    """Stats and recap fields for a list of calls"""
+    connections = sum(1 for call in calls if call["answered"])
+    breakdown = {}
+    for call in calls:
+        breakdown[call["disposition"]] = breakdown.get(call["disposition"], 0) + 1
+    return {
+        "totalCalls": len(calls),
+        "connections": connections,
+        "conversations": sum(1 for call in calls if call["answered"] and call["duration"] > 60),
+        "totalCost": round(sum(call["cost"] for call in calls), 2),
+        "dispositionBreakdown": breakdown
+    }
+
+
+class MockWebhook:
+    """In-memory implementation of the n8n endpoints used by app.py"""
+
+    TIME_FRAMES = {"today": 1, "last7days": 7, "last30days": 30, "last90days": 90,
+                   "thismonth": 31, "lastmonth": 62, "alltime": None}
+
+    def __init__(self, latency_ms=0, jitter_ms=0, seed=42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.data = build_dataset(seed=seed)
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.counters = {}
+        # Change log for conditional and delta responses
+        self.version = 0
+        self.changed = {}
+        self.deleted = {}
+        self.last_change = time.time()
+        self.next_lead_number = len(self.data["leads"])
+
+    def mark_changed(self, lead, deleted=False):
+        """Record a lead change (and its campaign, whose stats depend on it); caller holds the lock"""
+        self.version += 1
+        self.last_change = time.time()
+        (self.deleted if deleted else self.changed)[lead["lead_id"]] = self.version
+        campaign_id = (lead.get("campaign") or {}).get("campaign_id")
+        if campaign_id:
+            self.changed[campaign_id] = self.version
+
+    def delay(self):
+        """Simulate upstream latency"""
+        latency = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def count(self, key, response_bytes, outcome="full"):
+        with self.lock:
+            counter = self.counters.setdefault(key, {"requests": 0, "bytes": 0, "full": 0, "not_modified": 0, "delta": 0})
+            counter["requests"] += 1
+            counter["bytes"] += response_bytes
+            counter[outcome] += 1
+
+    def handle(self, method, path, query, body, headers=None):
+        """Return (status, payload, response headers, outcome) for a request
+
+        GET responses carry an ETag of the full body and are answered with 304
+        when it matches If-None-Match. List endpoints also send Last-Modified
+        and a cursor; with ?since=<cursor> they return only changed records.
+        """
+        headers = headers or {}
+        route = path.split("/webhook/", 1)[-1].strip("/")
+        handler = getattr(self, f"{method.lower()}_{route.replace('api/', '').replace('-', '_')}", None)
+        if route == "_stats":
+            with self.lock:
+                return 200, {"endpoints": json.loads(json.dumps(self.counters))}, {}, "full"
+        if handler is None:
+            return 404, {"error": f"Unknown endpoint {method} {route}"}, {}, "full"
+        since = query.pop("since", None)
+        status, payload = handler(query, body)
+        if method != "GET" or status != 200:
+            return status, payload, {}, "full"
+
+        with self.lock:
+            version = self.version
+            last_change = self.last_change
+            changed = dict(self.changed)
+            deleted = dict(self.deleted)
+        if route in DELTA_LISTS:
+            payload["cursor"] = str(version)
+        etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:20] + '"'
+        response_headers = {"ETag": etag}
+        # Dates have one-second resolution, so a date is only a valid validator once
+        # the second of the last change is over; a later change in that second would share it
+        if route in DELTA_LISTS and int(last_change) < int(time.time()):
+            response_headers["Last-Modified"] = formatdate(int(last_change), usegmt=True)
+
+        if headers.get("If-None-Match"):
+            if headers["If-None-Match"] == etag:
+                return 304, None, response_headers, "not_modified"
+        elif headers.get("If-Modified-Since") and route in DELTA_LISTS:
+            try:
+                if int(parsedate_to_datetime(headers["If-Modified-Since"]).timestamp()) >= int(last_change):
+                    return 304, None, response_headers, "not_modified"
+            except (TypeError, ValueError):
+                pass
+
+        if since is not None and route in DELTA_LISTS and since.isdigit() and int(since) <= version:
+            records_key, id_field = DELTA_LISTS[route]
+            cursor = int(since)
+            records = payload[records_key]
+            delta = {k: v for k, v in payload.items() if k != records_key}
+            delta["delta"] = True
+            delta[records_key] = [r for r in records if changed.get(r[id_field], 0) > cursor]
+            delta["deleted"] = [record_id for record_id, v in deleted.items() if v > cursor]
+            delta["order"] = [r[id_field] for r in records]
+            return 200, delta, response_headers, "delta"
+        return 200, payload, response_headers, "full"
+
+    def calls_since(self, days):
+        if days is None:
+            return self.data["calls"]
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+        return [call for call in self.data["calls"] if call["call_date"] >= cutoff]
+
+    def get_stats_v2(self, query, body):
+        calls = self.calls_since(self.TIME_FRAMES.get(query.get("timeFrame", "last7days"), 7))
+        stats = summarize_calls(calls)
+        lead_campaigns = {l["lead_id"]: (l.get("campaign") or {}).get("campaign_name") for l in self.data["leads"]}
+        campaign_breakdown = []
+        for campaign in self.data["campaigns"]:
+            campaign_calls = [c for c in calls if lead_campaigns.get(c["lead_id"]) == campaign["campaign_name"]]
+            summary = summarize_calls(campaign_calls)
+            summary.pop("dispositionBreakdown")
+            campaign_breakdown.append({"campaign_name": campaign["campaign_name"], **summary})
+        stats["campaignBreakdown"] = campaign_breakdown
+        stats["recentCalls"] = calls[:10]
+        return 200, stats
+
+    def get_leads(self, query, body):
+        leads = self.data["leads"]
+        if query.get("search"):
+            term = query["search"].lower()
+            leads = [l for l in leads if term in f"{l['first_name']} {l['last_name']} {l['email']} {l['mobile_phone']}".lower()]
+        if query.get("status"):
+            leads = [l for l in leads if l["status"] == query["status"]]
+        page, pagination = paginate(leads, query)
+        return 200, {"leads": page, "pagination": pagination}
+
+    def post_leads(self, query, body):
+        with self.lock:
+            for lead in self.data["leads"]:
+                if lead["lead_id"] == body.get("lead_id"):
+                    lead.update({k: v for k, v in body.items() if k != "lead_id"})
+                    self.mark_changed(lead)
+                    return 200, {"success": True, "lead": lead}
+        return 404, {"error": "Lead not found"}
+
+    def get_calls(self, query, body):
+        calls = self.data["calls"]
+        if query.get("dateFrom"):
+            calls = [c for c in calls if c["call_date"][:10] >= query["dateFrom"]]
+        if query.get("dateTo"):
+            calls = [c for c in calls if c["call_date"][:10] <= query["dateTo"]]
+        if query.get("disposition"):
+            calls = [c for c in calls if c["disposition"] == query["disposition"]]
+        page, pagination = paginate(calls, query)
+        return 200, {"calls": page, "pagination": pagination}
+
+    def get_get_campaigns(self, query, body):
+        campaigns = []
+        for campaign in self.data["campaigns"]:
+            campaign = dict(campaign)
+            if query.get("include_stats") == "true":
+                leads = [l for l in self.data["leads"] if (l.get("campaign") or {}).get("campaign_id") == campaign["campaign_id"]]
+                campaign["stats"] = {
+                    "total_leads": len(leads),
+                    "active_leads": sum(1 for l in leads if l["status"] in ("New", "Calling")),
+                    "completed_leads": sum(1 for l in leads if l["status"] == "Completed")
+                }
+            campaigns.append(campaign)
+        return 200, {"campaigns": campaigns}
+
+    def get_recap(self, query, body):
+        day = query.get("date", datetime.now().date().isoformat())
+        return 200, {"date": day, **summarize_calls([c for c in self.data["calls"] if c["call_date"][:10] == day])}
+
+    def post_trigger_call(self, query, body):
+        with self.lock:
+            for lead in self.data["leads"]:
+                if lead["lead_id"] == body.get("lead_id"):
+                    lead["status"] = "Calling"
+                    lead["call_count"] += 1
+                    self.mark_changed(lead)
+        return 200, {"success": True, "call_id": f"call-{int(time.time() * 1000)}"}
+
+    def post_create_lead(self, query, body):
+        with self.lock:
+            self.next_lead_number += 1
+            lead = dict(body, lead_id=f"lead-{self.next_lead_number}", status="New", call_count=0, campaign=None)
+            self.data["leads"].append(lead)
+            self.mark_changed(lead)
+        return 200, {"success": True, "lead": lead}
+
+    def post_delete_lead(self, query, body):
+        with self.lock:
+            removed = [l for l in self.data["leads"] if l["lead_id"] == body.get("lead_id")]
+            self.data["leads"] = [l for l in self.data["leads"] if l["lead_id"] != body.get("lead_id")]
+            for lead in removed:
+                self.mark_changed(lead, deleted=True)
+        return 200, {"success": bool(removed)}
+
+    def post_csv_upload_flexible(self, query, body):
+        rows = max(0, len((body.get("csv") or "").strip().splitlines()) - 1)
+        return 200, {"success": True, "imported": rows, "skipped": 0}
+
+
+def make_handler(webhook):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method):
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            body = {}
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except ValueError:
+                    body = {}
+            webhook.delay()
+            status, payload, headers, outcome = webhook.handle(method, parsed.path, query, body, self.headers)
+            data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+            webhook.count(f"{method} {parsed.path.split('/webhook/', 1)[-1]}", len(data), outcome)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond("GET")
+
+        def do_POST(self):
+            self._respond("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=8787, latency_ms=0, jitter_ms=0, host="127.0.0.1"):
+    """Create the mock webhook server (call serve_forever() to run it)"""
+    webhook = MockWebhook(latency_ms=latency_ms, jitter_ms=jitter_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(webhook))
+    server.daemon_threads = True
+    server.webhook = webhook
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock n8n webhook for AI-Caller")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=150, help="Simulated upstream latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Random +/- variation of the latency")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency_ms, args.jitter_ms, args.host)
+    print(f"Mock webhook listening on http://{args.host}:{args.port}/webhook "
+          f"(latency {args.latency_ms:g}ms +/- {args.jitter_ms:g}ms)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,584 @@
+"""
+AI-Caller - Concurrent-session load generator
+
+Starts the mock webhook and a real Streamlit server, then drives N concurrent
+browser-like sessions over Streamlit's websocket protocol and reports rerun
+latency, throughput and server resource usage as N scales.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+from http.cookies import SimpleCookie
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Streamlit ships the websockets package in newer releases and tornado in older ones
+try:
+    from websockets.asyncio.client import connect as websockets_connect
+    from websockets.exceptions import ConnectionClosed, WebSocketException
+    WEBSOCKET_ERRORS = (WebSocketException,)
+except ImportError:
+    websockets_connect = None
+    from tornado.httpclient import HTTPClientError
+    from tornado.websocket import WebSocketClosedError, websocket_connect as tornado_connect
+    WEBSOCKET_ERRORS = (HTTPClientError, WebSocketClosedError)
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(os.path.dirname(LOADTEST_DIR), "app.py")
+MOCK_PATH = os.path.join(LOADTEST_DIR, "mock_webhook.py")
+
+# Relative weights of the simulated operator flows
+FLOW_WEIGHTS = {"dashboard": 3, "leads": 4, "calls": 3, "upload": 1}
+CSV_FIELDS = ["first_name", "last_name", "email", "mobile_phone", "company"]
+
+
+class SessionClosed(Exception):
+    """The server closed a session's websocket"""
+
+
+# Errors that end a session: refused or dropped connections and rejected handshakes
+CONNECTION_ERRORS = (OSError, SessionClosed) + WEBSOCKET_ERRORS
+
+
+def csv_bytes(rows):
+    """A leads CSV like the ones operators upload"""
+    lines = [",".join(CSV_FIELDS)]
+    for i in range(rows):
+        lines.append(f"Load{i},Test{i},load{i}@example.com,+1666{i:07d},Load Co")
+    return "\n".join(lines).encode("utf-8")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_url(url, timeout=60):
+    """Poll a URL until it answers 200"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class ProcessSampler:
+    """Samples thread count, CPU time and RSS of a Linux process from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def sample(self):
+        if self.pid is None:
+            return None
+        try:
+            with open(f"/proc/{self.pid}/status", "r") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+            with open(f"/proc/{self.pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            return {
+                "time": time.perf_counter(),
+                "threads": int(status["Threads"].strip()),
+                "rss_bytes": int(status["VmRSS"].split()[0]) * 1024,
+                # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+                "cpu_seconds": (int(fields[11]) + int(fields[12])) / self.clock_ticks
+            }
+        except (OSError, KeyError, IndexError, ValueError):
+            # The process is gone or a zombie without memory stats
+            return None
+
+
+class WebSocketClient:
+    """Minimal binary websocket client on top of websockets or tornado"""
+
+    def __init__(self):
+        self.conn = None
+
+    async def connect(self, url):
+        if websockets_connect is not None:
+            self.conn = await websockets_connect(url, subprotocols=["streamlit"], max_size=64 * 1024 * 1024)
+        else:
+            self.conn = await tornado_connect(url, subprotocols=["streamlit"], max_message_size=64 * 1024 * 1024)
+
+    async def send(self, data):
+        if websockets_connect is not None:
+            await self.conn.send(data)
+        else:
+            await self.conn.write_message(data, binary=True)
+
+    async def recv(self):
+        """Next message, or None once the connection is closed"""
+        if websockets_connect is not None:
+            try:
+                return await self.conn.recv()
+            except ConnectionClosed:
+                return None
+        return await self.conn.read_message()
+
+    async def close(self):
+        if self.conn is None:
+            return
+        if websockets_connect is not None:
+            await self.conn.close()
+        else:
+            self.conn.close()
+
+
+class SimulatedSession:
+    """One browser tab talking to the Streamlit server over its websocket"""
+
+    def __init__(self, server_url, rng, timeout):
+        self.server_url = server_url
+        self.rng = rng
+        self.timeout = timeout
+        self.ws = None
+        self.reader = None
+        self.widgets = {}
+        self.seen_ids = set()
+        self.values = {}
+        self.triggers = []
+        self.finished = None
+        self.exceptions = 0
+        self.session_id = None
+        self.closed = False
+
+    async def connect(self):
+        ws_url = self.server_url.replace("http://", "ws://").rstrip("/") + "/_stcore/stream"
+        self.ws = WebSocketClient()
+        await self.ws.connect(ws_url)
+        self.reader = asyncio.ensure_future(self._read_loop())
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.reader is not None:
+            self.reader.cancel()
+
+    async def _read_loop(self):
+        while True:
+            raw = await self.ws.recv()
+            if raw is None:
+                # Wake a rerun waiting on this connection instead of letting it time out
+                self.closed = True
+                if self.finished is not None:
+                    self.finished.set()
+                return
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self.session_id = msg.new_session.initialize.session_id
+            elif kind == "delta":
+                self._index_delta(msg.delta)
+            elif kind == "script_finished" and self.finished is not None:
+                # st.rerun() ends a run early and immediately starts another one
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    self.finished.set()
+
+    def _index_delta(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        element_type = element.WhichOneof("type")
+        if element_type == "exception":
+            self.exceptions += 1
+            return
+        widget = getattr(element, element_type, None)
+        widget_id = getattr(widget, "id", "") if widget is not None else ""
+        if widget_id:
+            self.widgets[widget_id] = widget
+            self.seen_ids.add(widget_id)
+
+    def find(self, key=None, label=None):
+        """Find a widget rendered in the last run by its key or label"""
+        for widget_id in self.seen_ids:
+            widget = self.widgets[widget_id]
+            if key is not None and widget_id.endswith(f"-{key}"):
+                return widget_id, widget
+            if label is not None and getattr(widget, "label", None) == label:
+                return widget_id, widget
+        return None, None
+
+    def choose(self, key=None, label=None, option=None, index=None):
+        """Set a radio/selectbox value for the next rerun"""
+        widget_id, widget = self.find(key=key, label=label)
+        if widget_id is None:
+            return False
+        options = list(widget.options)
+        if option is not None:
+            if option not in options:
+                return False
+            index = options.index(option)
+        if index is None or index >= len(options):
+            return False
+        state = WidgetState(id=widget_id)
+        # Newer Streamlit versions serialize these widgets by value instead of index
+        if "raw_value" in widget.DESCRIPTOR.fields_by_name:
+            state.string_value = options[index]
+        else:
+            state.int_value = index
+        self.values[widget_id] = state
+        return True
+
+    def click(self, key=None, label=None):
+        """Press a button on the next rerun"""
+        widget_id, _ = self.find(key=key, label=label)
+        if widget_id is None:
+            return False
+        self.triggers.append(WidgetState(id=widget_id, trigger_value=True))
+        return True
+
+    async def rerun(self):
+        """Request a rerun with the current widget states and wait for it to finish"""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for widget_id, state in self.values.items():
+            if widget_id in self.seen_ids:
+                msg.rerun_script.widget_states.widgets.append(state)
+        msg.rerun_script.widget_states.widgets.extend(self.triggers)
+        self.triggers = []
+        self.seen_ids = set()
+        self.finished = asyncio.Event()
+        exceptions_before = self.exceptions
+
+        if self.closed:
+            raise SessionClosed()
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self.finished.wait(), self.timeout)
+        if self.closed:
+            raise SessionClosed()
+        return time.perf_counter() - start, self.exceptions == exceptions_before
+
+    async def navigate(self, page_name):
+        self.choose(label="Go to", option=page_name)
+        return await self.rerun()
+
+    def put_upload_file(self, file_id, name, data):
+        """PUT a file to Streamlit's upload endpoint, like the browser's file uploader"""
+        # The XSRF cookie set by the health check doubles as the upload token
+        with urllib.request.urlopen(self.server_url.rstrip("/") + "/_stcore/health", timeout=self.timeout) as response:
+            cookie = SimpleCookie(response.headers.get("Set-Cookie", "")).get("_streamlit_xsrf")
+            response.read()
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            "Content-Type: text/csv\r\n\r\n"
+        ).encode("utf-8") + data + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        if cookie is not None:
+            headers["Cookie"] = f"_streamlit_xsrf={cookie.value}"
+            headers["X-Xsrftoken"] = cookie.value
+        request = urllib.request.Request(
+            f"{self.server_url.rstrip('/')}/_stcore/upload_file/{self.session_id}/{file_id}",
+            data=body, headers=headers, method="PUT"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def attach_file(self, key, file_id, name, size):
+        """Point a file uploader at an uploaded file for the next rerun"""
+        widget_id, _ = self.find(key=key)
+        if widget_id is None:
+            return False
+        state = WidgetState(id=widget_id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id = file_id
+        info.name = name
+        info.size = size
+        self.values[widget_id] = state
+        return True
+
+    async def run_flow(self, flow, record):
+        """Run one operator flow, recording every rerun"""
+        async def step(name, coro):
+            try:
+                elapsed, ok = await coro
+            except asyncio.TimeoutError:
+                record(flow, name, self.timeout, False, timed_out=True)
+                return False
+            except CONNECTION_ERRORS:
+                record(flow, name, 0, False)
+                return False
+            record(flow, name, elapsed, ok)
+            return True
+
+        if flow == "dashboard":
+            if await step("open dashboard", self.navigate("Dashboard")):
+                if self.choose(key="dashboard_timeframe", index=self.rng.randrange(7)):
+                    await step("change time frame", self.rerun())
+        elif flow == "leads":
+            if await step("open leads", self.navigate("Leads")):
+                if self.click("next_page"):
+                    await step("next page", self.rerun())
+                if self.choose(key="selected_lead_display", index=1):
+                    await step("select lead", self.rerun())
+                    if self.click("trigger_call"):
+                        await step("trigger call", self.rerun())
+        elif flow == "calls":
+            if await step("open calls", self.navigate("Calls")):
+                if self.choose(key="call_disposition", index=self.rng.randrange(6)):
+                    await step("filter calls", self.rerun())
+        elif flow == "upload":
+            if await step("open leads", self.navigate("Leads")):
+                data = csv_bytes(200)
+                file_id = uuid.uuid4().hex
+                start = time.perf_counter()
+                try:
+                    await asyncio.get_event_loop().run_in_executor(
+                        None, self.put_upload_file, file_id, "leads.csv", data
+                    )
+                    record(flow, "put file", time.perf_counter() - start, True, rerun=False)
+                except OSError:
+                    record(flow, "put file", time.perf_counter() - start, False, rerun=False)
+                    return
+                if self.attach_file("csv_upload", file_id, "leads.csv", len(data)):
+                    if await step("preview csv", self.rerun()):
+                        for field in CSV_FIELDS:
+                            self.choose(key=f"mapping_{field}", option=field)
+                        if self.click(label="Upload CSV"):
+                            await step("submit mapping", self.rerun())
+
+
+class LevelResults:
+    """Rerun timings collected for one concurrency level"""
+
+    def __init__(self):
+        self.reruns = []
+        self.direct = []
+        self.errors = 0
+        self.timeouts = 0
+
+    def record(self, flow, step, elapsed, ok, timed_out=False, rerun=True):
+        (self.reruns if rerun else self.direct).append({"flow": flow, "step": step, "seconds": elapsed, "ok": ok})
+        if not ok:
+            self.errors += 1
+        if timed_out:
+            self.timeouts += 1
+
+
+def webhook_counters(webhook_url):
+    """Totals of the mock webhook's request counters (None for other webhooks)"""
+    try:
+        with urllib.request.urlopen(f"{webhook_url}/_stats", timeout=5) as response:
+            endpoints = json.load(response)["endpoints"]
+        return {
+            field: sum(counter.get(field, 0) for counter in endpoints.values())
+            for field in ("requests", "bytes", "not_modified", "delta")
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+async def run_level(num_sessions, args, server_pid, webhook_url):
+    """Drive num_sessions concurrent sessions for args.duration seconds"""
+    results = LevelResults()
+    sampler = ProcessSampler(server_pid)
+    samples = []
+    counters_before = webhook_counters(webhook_url)
+    stop_at = time.perf_counter() + args.duration
+
+    async def sample_loop():
+        while time.perf_counter() < stop_at:
+            sample = sampler.sample()
+            if sample:
+                samples.append(sample)
+            await asyncio.sleep(0.5)
+
+    async def session_loop(index):
+        rng = random.Random(args.seed * 1000 + index)
+        session = SimulatedSession(args.server_url, rng, args.timeout)
+        try:
+            try:
+                await session.connect()
+            except CONNECTION_ERRORS:
+                results.record("open", "connect", 0, False)
+                return
+            try:
+                elapsed, ok = await session.rerun()
+                results.record("open", "open session", elapsed, ok)
+            except asyncio.TimeoutError:
+                results.record("open", "open session", args.timeout, False, timed_out=True)
+                return
+            except CONNECTION_ERRORS:
+                results.record("open", "open session", 0, False)
+                return
+            flows = list(FLOW_WEIGHTS)
+            weights = [FLOW_WEIGHTS[flow] for flow in flows]
+            while time.perf_counter() < stop_at and not session.closed:
+                await session.run_flow(rng.choices(flows, weights)[0], results.record)
+                await asyncio.sleep(args.think_time_ms / 1000 * rng.uniform(0.5, 1.5))
+        finally:
+            await session.close()
+
+    started = time.perf_counter()
+    sampler_task = asyncio.ensure_future(sample_loop())
+    # One broken session must not abort the level; count it as an error instead
+    for outcome in await asyncio.gather(*(session_loop(i) for i in range(num_sessions)), return_exceptions=True):
+        if isinstance(outcome, Exception):
+            results.record("open", f"session error ({type(outcome).__name__})", 0, False)
+    wall = time.perf_counter() - started
+    await sampler_task
+    counters_after = webhook_counters(webhook_url)
+    upstream = None
+    if counters_before is not None and counters_after is not None:
+        upstream = {field: counters_after[field] - counters_before[field] for field in counters_after}
+
+    latencies_ms = [r["seconds"] * 1000 for r in results.reruns if r["ok"]]
+    summary = {
+        "sessions": num_sessions,
+        "wall_seconds": round(wall, 2),
+        "reruns": len(results.reruns),
+        "throughput_rps": round(len(results.reruns) / wall, 2) if wall else None,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "max_ms": max(latencies_ms) if latencies_ms else None,
+        "errors": results.errors,
+        "timeouts": results.timeouts,
+        "upstream_requests": upstream["requests"] if upstream else None,
+        "upstream_kb": round(upstream["bytes"] / 1024, 1) if upstream else None,
+        "upstream_not_modified": upstream["not_modified"] if upstream else None,
+        "upstream_delta": upstream["delta"] if upstream else None,
+        "peak_threads": max((s["threads"] for s in samples), default=None),
+        "peak_rss_mb": round(max((s["rss_bytes"] for s in samples), default=0) / 1024 / 1024, 1) if samples else None,
+        "cpu_percent": None,
+        "steps": {}
+    }
+    if len(samples) > 1:
+        cpu = samples[-1]["cpu_seconds"] - samples[0]["cpu_seconds"]
+        summary["cpu_percent"] = round(cpu / (samples[-1]["time"] - samples[0]["time"]) * 100, 1)
+
+    for record in results.reruns + results.direct:
+        name = f"{record['flow']}: {record['step']}"
+        summary["steps"].setdefault(name, []).append(record["seconds"] * 1000)
+    summary["steps"] = {
+        name: {"count": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+        for name, values in sorted(summary["steps"].items())
+    }
+    return summary
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:,.0f}"
+
+
+def print_report(levels):
+    header = ["Sessions", "Reruns", "Reruns/s", "p50 ms", "p95 ms", "Max ms", "Errors", "Threads", "CPU %", "RSS MB",
+              "Upstream", "304/Delta", "Upstream KB"]
+    rows = [[
+        str(level["sessions"]),
+        str(level["reruns"]),
+        "-" if level["throughput_rps"] is None else f"{level['throughput_rps']:.2f}",
+        format_ms(level["p50_ms"]),
+        format_ms(level["p95_ms"]),
+        format_ms(level["max_ms"]),
+        f"{level['errors']} ({level['timeouts']} timeouts)" if level["timeouts"] else str(level["errors"]),
+        "-" if level["peak_threads"] is None else str(level["peak_threads"]),
+        "-" if level["cpu_percent"] is None else f"{level['cpu_percent']:.0f}",
+        "-" if level["peak_rss_mb"] is None else f"{level['peak_rss_mb']:.0f}",
+        "-" if level["upstream_requests"] is None else str(level["upstream_requests"]),
+        "-" if level["upstream_requests"] is None else f"{level['upstream_not_modified']}/{level['upstream_delta']}",
+        "-" if level["upstream_kb"] is None else f"{level['upstream_kb']:,.0f}"
+    ] for level in levels]
+    widths = [max(len(h), *(len(r[i]) for r in rows)) for i, h in enumerate(header)]
+    print()
+    print("  ".join(h.rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the AI-Caller Streamlit app")
+    parser.add_argument("--sessions", default="1,5,10,25,50", help="Comma separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run each level")
+    parser.add_argument("--think-time-ms", type=float, default=1000, help="Average pause between flows per session")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Mock webhook latency")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Mock webhook latency jitter")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for a single rerun")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--server-url", help="Use an already running Streamlit server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of --server-url's process, for thread/CPU/memory stats")
+    parser.add_argument("--webhook-url", help="Use an already running webhook instead of the mock")
+    parser.add_argument("--no-conditional", action="store_true",
+                        help="Start the app with conditional requests disabled, for comparison")
+    parser.add_argument("--output", help="Write the full results as JSON to this file")
+    args = parser.parse_args()
+
+    processes = []
+    try:
+        webhook_url = args.webhook_url
+        if not webhook_url:
+            mock_port = free_port()
+            processes.append(subprocess.Popen([
+                sys.executable, MOCK_PATH, "--port", str(mock_port),
+                "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms)
+            ], stdout=subprocess.DEVNULL))
+            webhook_url = f"http://127.0.0.1:{mock_port}/webhook"
+            wait_for_url(f"{webhook_url}/_stats")
+
+        server_pid = args.server_pid
+        if not args.server_url:
+            server_port = free_port()
+            env = dict(os.environ, N8N_WEBHOOK_BASE_URL=webhook_url,
+                       AI_CALLER_RECAP_CACHE_DIR=tempfile.mkdtemp(prefix="ai-caller-recaps-"))
+            if args.no_conditional:
+                env["AI_CALLER_CONDITIONAL_REQUESTS"] = "0"
+            server = subprocess.Popen([
+                sys.executable, "-m", "streamlit", "run", APP_PATH,
+                "--server.port", str(server_port), "--server.address", "127.0.0.1",
+                "--server.headless", "true", "--browser.gatherUsageStats", "false"
+            ], env=env, cwd=os.path.dirname(APP_PATH), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(server)
+            args.server_url = f"http://127.0.0.1:{server_port}"
+            server_pid = server.pid
+            wait_for_url(f"{args.server_url}/_stcore/health")
+
+        levels = []
+        for num_sessions in [int(n) for n in args.sessions.split(",") if n.strip()]:
+            print(f"Running {num_sessions} concurrent sessions for {args.duration:g}s...", flush=True)
+            levels.append(asyncio.run(run_level(num_sessions, args, server_pid, webhook_url)))
+        print_report(levels)
+
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+            print(f"\nFull results written to {args.output}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()